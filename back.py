@@ -3,18 +3,34 @@ Backend API FastAPI pour Deals Finder
 Expose les endpoints pour récupérer les bonnes affaires
 """
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Query
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional, Dict
 import asyncio
 import aiohttp
 from datetime import datetime, timedelta
-import json
+import os
+import tempfile
+import orjson
+import numpy as np
+import polars as pl
+from cachetools import TTLCache
+from collections import OrderedDict
+from heapq import merge
+from itertools import islice
+from operator import itemgetter
 from pathlib import Path
-import hashlib
+import xxhash
 
-app = FastAPI(title="Deals Finder API", version="1.0.0")
+# Dépendance optionnelle : cache sémantique (voir SimilarityCache)
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    SentenceTransformer = None
+
+app = FastAPI(title="Deals Finder API", version="1.0.0", default_response_class=ORJSONResponse)
 
 # Configuration CORS pour permettre les requêtes depuis le frontend
 app.add_middleware(
@@ -26,8 +42,107 @@ app.add_middleware(
 )
 
 # Cache en mémoire (en production : Redis)
-cache = {}
+# TTLCache : taille bornée + expiration automatique, éviction LRU en O(1)
 CACHE_DURATION = timedelta(minutes=30)
+cache = TTLCache(maxsize=1024, ttl=CACHE_DURATION.total_seconds())
+
+# Single-flight : scrapes en cours, pour que des recherches identiques
+# concurrentes attendent le même résultat au lieu de scraper en double
+in_flight: Dict[str, asyncio.Task] = {}
+
+class SimilarityCache:
+    """
+    Cache L2 sémantique : des requêtes quasi identiques ("iphone 13",
+    "iPhone13") réutilisent les résultats de scraping déjà obtenus.
+    Désactivé si sentence-transformers n'est pas installé.
+    """
+
+    def __init__(self, threshold: float = 0.85,
+                 model_name: str = "paraphrase-multilingual-MiniLM-L12-v2",
+                 maxsize: int = 512):
+        self.threshold = threshold
+        self.model_name = model_name
+        self.maxsize = maxsize
+        self.model = None
+        # (query, scope) -> (embedding normalisé, produits, date d'insertion)
+        self._entries = OrderedDict()
+
+    def load_model(self):
+        """Charge le modèle une fois au démarrage (premier appel à chaud)"""
+        if SentenceTransformer is not None and self.model is None:
+            self.model = SentenceTransformer(self.model_name)
+
+    def _embed(self, query: str):
+        return self.model.encode(query, normalize_embeddings=True)
+
+    @staticmethod
+    def _scope(platform: Optional[str]) -> Optional[str]:
+        """Normalise le périmètre plateforme (None et 'all' sont équivalents)"""
+        return None if platform in (None, 'all') else platform
+
+    def _purge_expired(self):
+        """Évince les entrées plus vieilles que CACHE_DURATION (même TTL que le cache exact)"""
+        now = datetime.now()
+        expired = [
+            key for key, (_, _, saved_at) in self._entries.items()
+            if now - saved_at >= CACHE_DURATION
+        ]
+        for key in expired:
+            del self._entries[key]
+
+    async def get(self, query: str, platform: Optional[str] = None) -> Optional[List[Dict]]:
+        """Retourne les produits de la requête la plus proche au-dessus du seuil
+        (uniquement parmi les scrapes couvrant le même périmètre plateforme)"""
+        if self.model is None or not self._entries:
+            return None
+        self._purge_expired()
+        scope = self._scope(platform)
+        candidates = [
+            (key, entry) for key, entry in self._entries.items() if key[1] == scope
+        ]
+        if not candidates:
+            return None
+        embedding = await asyncio.to_thread(self._embed, query)
+        # Embeddings normalisés : la similarité cosinus est un produit scalaire
+        matrix = np.stack([entry[0] for _, entry in candidates])
+        scores = matrix @ embedding
+        best = int(scores.argmax())
+        if scores[best] >= self.threshold:
+            key, entry = candidates[best]
+            self._entries.move_to_end(key)
+            print(f"✅ Cache sémantique hit: {query!r} ≈ {key[0]!r} ({scores[best]:.2f})")
+            return entry[1]
+        return None
+
+    async def set(self, query: str, products: List[Dict], platform: Optional[str] = None):
+        """Mémorise les résultats de scraping pour cette requête et ce périmètre"""
+        if self.model is None:
+            return
+        embedding = await asyncio.to_thread(self._embed, query)
+        key = (query, self._scope(platform))
+        self._entries[key] = (embedding, products, datetime.now())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+sim_cache = SimilarityCache()
+
+@app.on_event("startup")
+async def load_similarity_model():
+    """Précharge le modèle d'embeddings pour ne pas pénaliser la 1ère requête"""
+    await asyncio.to_thread(sim_cache.load_model)
+
+@app.on_event("startup")
+async def open_http_session():
+    """Session HTTP partagée : un seul pool de connexions keep-alive pour tous les scrapes"""
+    app.state.http = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=100, ttl_dns_cache=300, keepalive_timeout=30)
+    )
+
+@app.on_event("shutdown")
+async def close_http_session():
+    """Ferme proprement le pool de connexions"""
+    await app.state.http.close()
 
 # Modèles Pydantic
 class Product(BaseModel):
@@ -62,174 +177,213 @@ class StatsResponse(BaseModel):
     categories: Dict[str, int]
 
 # Base de données simulée (en production : PostgreSQL/MongoDB)
+# Store au format Parquet : layout colonnaire, strings dictionary-encodées,
+# fichier bien plus compact que le JSON indenté
 DATA_DIR = Path("data")
 DATA_DIR.mkdir(exist_ok=True)
-PRODUCTS_FILE = DATA_DIR / "products.json"
+PRODUCTS_FILE = DATA_DIR / "products.parquet"
+LEGACY_PRODUCTS_FILE = DATA_DIR / "products.json"
+
+# Colonnes exposées dans la vue SoA utilisée par les agrégats
+SOA_COLUMNS = ('priceAverage', 'priceSale', 'discount', 'platform', 'category')
+
+# Cache du fichier produits : on ne relit le Parquet que si le fichier a changé
+_products_cache = {"mtime": None, "data": [], "soa": None}
 
 def load_products() -> List[Dict]:
-    """Charge les produits depuis le fichier JSON"""
-    if PRODUCTS_FILE.exists():
-        with open(PRODUCTS_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return []
+    """Charge les produits depuis le fichier Parquet (cache invalidé sur mtime)"""
+    if not PRODUCTS_FILE.exists():
+        if not LEGACY_PRODUCTS_FILE.exists():
+            return []
+        # Migration transparente de l'ancien store JSON
+        save_products(orjson.loads(LEGACY_PRODUCTS_FILE.read_bytes()))
+    mtime = PRODUCTS_FILE.stat().st_mtime
+    if _products_cache["mtime"] != mtime:
+        df = pl.read_parquet(PRODUCTS_FILE)
+        data = df.to_dicts()
+        # Titre pré-minusculé une fois par rechargement : le filtre texte de
+        # get_products évite un .lower() par produit et par requête
+        # (champ non déclaré dans Product, donc absent des réponses)
+        for p in data:
+            p['_title_lower'] = p['title'].lower()
+        _products_cache["data"] = data
+        # Vue colonne tirée directement du Parquet (déjà colonnaire, zéro copie
+        # Python intermédiaire)
+        _products_cache["soa"] = (
+            {col: df[col].to_numpy() for col in SOA_COLUMNS} if df.height else None
+        )
+        _products_cache["mtime"] = mtime
+    return _products_cache["data"]
+
+def products_etag() -> Optional[str]:
+    """ETag faible dérivé du mtime du fichier produits (None si pas de fichier)"""
+    mtime = _products_cache["mtime"]
+    if mtime is None:
+        return None
+    return f'W/"{int(mtime * 1e6):x}"'
 
 def save_products(products: List[Dict]):
-    """Sauvegarde les produits dans le fichier JSON"""
-    with open(PRODUCTS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(products, f, ensure_ascii=False, indent=2)
+    """Sauvegarde les produits au format Parquet (écriture atomique)"""
+    df = pl.from_dicts(products) if products else pl.DataFrame()
+    # Fichier temporaire unique + os.replace : aucun lecteur ne voit un fichier
+    # partiel, et deux écritures concurrentes ne se marchent pas dessus
+    fd, tmp_path = tempfile.mkstemp(dir=DATA_DIR, suffix='.parquet.tmp')
+    os.close(fd)
+    df.write_parquet(tmp_path)
+    os.replace(tmp_path, PRODUCTS_FILE)
+    # Force la relecture au prochain load_products
+    _products_cache["mtime"] = None
 
-async def scrape_leboncoin(query: str, max_results: int = 20) -> List[Dict]:
+async def save_products_async(products: List[Dict]):
+    """Écrit dans un thread pour ne pas bloquer l'event loop pendant l'I/O disque"""
+    await asyncio.to_thread(save_products, products)
+
+# Configuration des plateformes : une entrée par site, un seul scraper générique
+PLATFORM_CONFIGS = {
+    'leboncoin': {
+        'label': 'Leboncoin',
+        'templates': {
+            'iphone': {'avgPrice': 850, 'category': 'Téléphonie', 'emoji': '📱'},
+            'macbook': {'avgPrice': 1600, 'category': 'Informatique', 'emoji': '💻'},
+            'ps5': {'avgPrice': 450, 'category': 'Jeux vidéo', 'emoji': '🎮'},
+            'jordan': {'avgPrice': 150, 'category': 'Chaussures', 'emoji': '👟'},
+            'canapé': {'avgPrice': 700, 'category': 'Mobilier', 'emoji': '🛋️'},
+        },
+        'default_template': {'avgPrice': 500, 'category': 'Divers', 'emoji': '📦'},
+        'locations': ['Paris', 'Lyon', 'Marseille', 'Toulouse', 'Bordeaux', 'Nice'],
+        'deal_chance': 0.3,
+        'deal_ratio': (0.3, 0.6),
+        'normal_ratio': (0.75, 0.95),
+        'condition': 'Excellent état',
+        'seller_fmt': 'User{}',
+        'seller_range': (1000, 9999),
+        'posted_max_hours': 48,
+        'color': '#ff6e14',
+        'url_fmt': 'https://www.leboncoin.fr/ad/{}',
+        'url_range': (1000000000, 9999999999),
+    },
+    'vinted': {
+        'label': 'Vinted',
+        'templates': {
+            'nike': {'avgPrice': 120, 'category': 'Chaussures', 'emoji': '👟'},
+            'zara': {'avgPrice': 80, 'category': 'Vêtements', 'emoji': '👔'},
+            'sac': {'avgPrice': 200, 'category': 'Mode', 'emoji': '👜'},
+            'pull': {'avgPrice': 60, 'category': 'Vêtements', 'emoji': '🧥'},
+        },
+        'default_template': {'avgPrice': 100, 'category': 'Mode', 'emoji': '👕'},
+        'locations': ['Paris', 'Lyon', 'Marseille', 'Lille', 'Nantes'],
+        'deal_chance': 0.35,
+        'deal_ratio': (0.25, 0.55),
+        'normal_ratio': (0.75, 0.95),
+        'condition': 'Très bon état',
+        'seller_fmt': 'VintedUser{}',
+        'seller_range': (100, 999),
+        'posted_max_hours': 72,
+        'color': '#09b1ba',
+        'url_fmt': 'https://www.vinted.fr/items/{}',
+        'url_range': (1000000, 9999999),
+    },
+}
+
+# Générateur partagé pour les tirages aléatoires vectorisés (PCG64)
+rng = np.random.default_rng()
+
+async def scrape_platform(platform: str, query: str, max_results: int = 20,
+                          session: Optional[aiohttp.ClientSession] = None) -> List[Dict]:
     """
-    Scrape Leboncoin (simulation pour la démo)
-    En production : utiliser le scraper réel
+    Scrape une plateforme d'après sa config (simulation pour la démo)
+    En production : utiliser le scraper réel via `session.get(...)`
+    (session partagée = pas de handshake TCP/TLS par requête)
     """
-    print(f"🔍 Scraping Leboncoin pour: {query}")
-    
-    # Simulation de données (remplacer par le vrai scraper)
-    products = []
-    
-    # Produits de base avec leurs prix moyens
-    product_templates = {
-        'iphone': {'avgPrice': 850, 'category': 'Téléphonie', 'emoji': '📱'},
-        'macbook': {'avgPrice': 1600, 'category': 'Informatique', 'emoji': '💻'},
-        'ps5': {'avgPrice': 450, 'category': 'Jeux vidéo', 'emoji': '🎮'},
-        'jordan': {'avgPrice': 150, 'category': 'Chaussures', 'emoji': '👟'},
-        'canapé': {'avgPrice': 700, 'category': 'Mobilier', 'emoji': '🛋️'},
-    }
-    
+    config = PLATFORM_CONFIGS[platform]
+    print(f"🔍 Scraping {config['label']} pour: {query}")
+
     # Trouver le template correspondant
-    template = None
-    for key, value in product_templates.items():
-        if key in query.lower():
+    query_l = query.lower()
+    template = config['default_template']
+    for key, value in config['templates'].items():
+        if key in query_l:
             template = value
             break
-    
-    if not template:
-        template = {'avgPrice': 500, 'category': 'Divers', 'emoji': '📦'}
-    
-    # Générer des annonces avec variation de prix
-    import random
-    locations = ['Paris', 'Lyon', 'Marseille', 'Toulouse', 'Bordeaux', 'Nice']
-    
-    for i in range(max_results):
-        # 30% de chance d'être une bonne affaire
-        is_deal = random.random() < 0.3
-        price_ratio = random.uniform(0.3, 0.6) if is_deal else random.uniform(0.75, 0.95)
-        
-        price = round(template['avgPrice'] * price_ratio)
-        discount = round(((template['avgPrice'] - price) / template['avgPrice']) * 100)
-        
-        if discount < 40:  # On ne garde que les bonnes affaires
-            continue
-            
-        products.append({
-            'title': f"{query.title()} - Excellent état",
-            'platform': 'leboncoin',
-            'priceAverage': template['avgPrice'],
-            'priceSale': price,
-            'discount': discount,
-            'location': random.choice(locations),
-            'category': template['category'],
-            'seller': f"User{random.randint(1000, 9999)}",
-            'postedHoursAgo': random.randint(1, 48),
-            'emoji': template['emoji'],
-            'color': '#ff6e14',
-            'url': f"https://www.leboncoin.fr/ad/{random.randint(1000000000, 9999999999)}"
-        })
-    
-    await asyncio.sleep(0.5)  # Simulation du temps de scraping
-    return products
 
-async def scrape_vinted(query: str, max_results: int = 20) -> List[Dict]:
-    """
-    Scrape Vinted (simulation pour la démo)
-    En production : utiliser le scraper réel ou l'API Vinted
-    """
-    print(f"🔍 Scraping Vinted pour: {query}")
-    
-    # Simulation similaire à Leboncoin
+    # Valeurs communes hoistées hors de la boucle de génération
+    avg_price = template['avgPrice']
+    title = f"{query.title()} - {config['condition']}"
+    locations = config['locations']
+
+    # Tirages aléatoires vectorisés : un lot numpy par attribut au lieu
+    # d'appels random.* par produit
+    is_deal = rng.random(max_results) < config['deal_chance']
+    ratios = np.where(
+        is_deal,
+        rng.uniform(*config['deal_ratio'], max_results),
+        rng.uniform(*config['normal_ratio'], max_results),
+    )
+    prices = np.rint(avg_price * ratios).astype(np.int64)
+    discounts = np.rint((avg_price - prices) / avg_price * 100).astype(np.int64)
+
+    # On ne garde que les bonnes affaires
+    keep = np.flatnonzero(discounts >= 40)
+    prices = prices[keep].tolist()
+    discounts = discounts[keep].tolist()
+    n_kept = len(keep)
+
+    location_idx = rng.integers(0, len(locations), n_kept).tolist()
+    sellers = rng.integers(config['seller_range'][0], config['seller_range'][1] + 1, n_kept).tolist()
+    posted_hours = rng.integers(1, config['posted_max_hours'] + 1, n_kept).tolist()
+    url_ids = rng.integers(config['url_range'][0], config['url_range'][1] + 1, n_kept).tolist()
+
+    # Seule passe Python restante : l'assemblage des dicts
     products = []
-    
-    product_templates = {
-        'nike': {'avgPrice': 120, 'category': 'Chaussures', 'emoji': '👟'},
-        'zara': {'avgPrice': 80, 'category': 'Vêtements', 'emoji': '👔'},
-        'sac': {'avgPrice': 200, 'category': 'Mode', 'emoji': '👜'},
-        'pull': {'avgPrice': 60, 'category': 'Vêtements', 'emoji': '🧥'},
-    }
-    
-    template = None
-    for key, value in product_templates.items():
-        if key in query.lower():
-            template = value
-            break
-    
-    if not template:
-        template = {'avgPrice': 100, 'category': 'Mode', 'emoji': '👕'}
-    
-    import random
-    locations = ['Paris', 'Lyon', 'Marseille', 'Lille', 'Nantes']
-    
-    for i in range(max_results):
-        is_deal = random.random() < 0.35
-        price_ratio = random.uniform(0.25, 0.55) if is_deal else random.uniform(0.75, 0.95)
-        
-        price = round(template['avgPrice'] * price_ratio)
-        discount = round(((template['avgPrice'] - price) / template['avgPrice']) * 100)
-        
-        if discount < 40:
-            continue
-            
+    for i in range(n_kept):
         products.append({
-            'title': f"{query.title()} - Très bon état",
-            'platform': 'vinted',
-            'priceAverage': template['avgPrice'],
-            'priceSale': price,
-            'discount': discount,
-            'location': random.choice(locations),
+            'title': title,
+            'platform': platform,
+            'priceAverage': avg_price,
+            'priceSale': prices[i],
+            'discount': discounts[i],
+            'location': locations[location_idx[i]],
             'category': template['category'],
-            'seller': f"VintedUser{random.randint(100, 999)}",
-            'postedHoursAgo': random.randint(1, 72),
+            'seller': config['seller_fmt'].format(sellers[i]),
+            'postedHoursAgo': posted_hours[i],
             'emoji': template['emoji'],
-            'color': '#09b1ba',
-            'url': f"https://www.vinted.fr/items/{random.randint(1000000, 9999999)}"
+            'color': config['color'],
+            'url': config['url_fmt'].format(url_ids[i])
         })
-    
-    await asyncio.sleep(0.5)
+
+    # Tri local : permet une fusion O(N log K) des plateformes en aval
+    products.sort(key=itemgetter('discount'), reverse=True)
+
+    await asyncio.sleep(0.5)  # Simulation du temps de scraping
     return products
 
 async def scrape_all_platforms(query: str, platform: Optional[str] = None) -> List[Dict]:
     """
     Scrape toutes les plateformes ou une plateforme spécifique
     """
-    tasks = []
-    
-    if platform is None or platform == 'all' or platform == 'leboncoin':
-        tasks.append(scrape_leboncoin(query, max_results=25))
-    
-    if platform is None or platform == 'all' or platform == 'vinted':
-        tasks.append(scrape_vinted(query, max_results=25))
+    # Toutes les tâches partagent le pool de connexions de l'application
+    session = getattr(app.state, "http", None)
+    tasks = [
+        scrape_platform(name, query, max_results=25, session=session)
+        for name in PLATFORM_CONFIGS
+        if platform in (None, 'all', name)
+    ]
     
     results = await asyncio.gather(*tasks)
-    
-    # Combiner et trier les résultats
-    all_products = []
-    product_id = 1
-    
-    for result in results:
-        for product in result:
-            product['id'] = product_id
-            all_products.append(product)
-            product_id += 1
-    
-    # Trier par discount décroissant
-    all_products.sort(key=lambda x: x['discount'], reverse=True)
-    
+
+    # Les sous-listes sont déjà triées par discount décroissant :
+    # fusion O(N log K) au lieu d'un tri complet O(N log N)
+    all_products = list(merge(*results, key=itemgetter('discount'), reverse=True))
+
+    # Ids attribués après le tri, en une seule énumération
+    for product_id, product in enumerate(all_products, 1):
+        product['id'] = product_id
+
     return all_products
 
 def get_cache_key(query: str, location: Optional[str], platform: Optional[str]) -> str:
-    """Génère une clé de cache unique"""
-    key = f"{query}_{location}_{platform}"
-    return hashlib.md5(key.encode()).hexdigest()
+    """Génère une clé de cache unique (xxh3 : bien plus rapide que md5 sur de petites clés)"""
+    return xxhash.xxh3_64_hexdigest(f"{query}|{location}|{platform}".encode())
 
 # Endpoints de l'API
 
@@ -247,8 +401,9 @@ async def root():
         }
     }
 
-@app.get("/api/products", response_model=List[Product])
+@app.get("/api/products")
 async def get_products(
+    request: Request,
     query: Optional[str] = None,
     location: Optional[str] = None,
     category: Optional[str] = None,
@@ -258,29 +413,49 @@ async def get_products(
 ):
     """
     Récupère la liste des produits (bonnes affaires uniquement)
+    Réponse en NDJSON streamé : un produit sérialisé par ligne
     """
     # Charger les produits existants
     products = load_products()
-    
-    # Filtrer selon les critères
-    filtered = products
-    
-    if query:
-        filtered = [p for p in filtered if query.lower() in p['title'].lower()]
-    
-    if location and location != 'all':
-        filtered = [p for p in filtered if p['location'] == location]
-    
-    if category and category != 'all':
-        filtered = [p for p in filtered if p['category'] == category]
-    
-    if platform and platform != 'all':
-        filtered = [p for p in filtered if p['platform'] == platform]
-    
-    if min_discount:
-        filtered = [p for p in filtered if p['discount'] >= min_discount]
-    
-    return filtered[:max_results]
+
+    # Les données n'ont pas changé depuis le dernier poll : réponse vide 304
+    etag = products_etag()
+    if etag and request.headers.get("if-none-match") == etag:
+        return Response(status_code=304)
+
+    # Normaliser les critères une seule fois hors de la boucle
+    # (chaîne vide ou 'all' = pas de filtre, comme avant la fusion des passes)
+    query_l = query.lower() if query else None
+    if not location or location == 'all':
+        location = None
+    if not category or category == 'all':
+        category = None
+    if not platform or platform == 'all':
+        platform = None
+
+    # Un seul passage sur la liste, arrêt anticipé dès max_results atteints
+    filtered = islice(
+        (
+            p for p in products
+            if (query_l is None or query_l in p['_title_lower'])
+            and (location is None or p['location'] == location)
+            and (category is None or p['category'] == category)
+            and (platform is None or p['platform'] == platform)
+            and p['discount'] >= min_discount
+        ),
+        max_results
+    )
+
+    def generate():
+        # Les produits partent au fil de l'eau : TTFB bas, mémoire constante
+        for p in filtered:
+            yield orjson.dumps({k: v for k, v in p.items() if k != '_title_lower'}) + b"\n"
+
+    return StreamingResponse(
+        generate(),
+        media_type="application/x-ndjson",
+        headers={"ETag": etag} if etag else None
+    )
 
 @app.post("/api/search")
 async def search_products(
@@ -297,25 +472,42 @@ async def search_products(
         search_request.platform
     )
     
-    # Vérifier le cache
-    if cache_key in cache:
-        cached_data, cached_time = cache[cache_key]
-        if datetime.now() - cached_time < CACHE_DURATION:
-            print(f"✅ Cache hit pour: {search_request.query}")
-            return {
-                "status": "success",
-                "cached": True,
-                "products": cached_data,
-                "count": len(cached_data)
-            }
-    
-    # Lancer le scraping
-    print(f"🚀 Nouveau scraping pour: {search_request.query}")
-    products = await scrape_all_platforms(
-        search_request.query,
-        search_request.platform
-    )
-    
+    # Vérifier le cache (l'expiration est gérée par le TTLCache)
+    cached_data = cache.get(cache_key)
+    if cached_data is not None:
+        print(f"✅ Cache hit pour: {search_request.query}")
+        return {
+            "status": "success",
+            "cached": True,
+            "products": cached_data,
+            "count": len(cached_data)
+        }
+
+    # Cache sémantique : une requête proche a-t-elle déjà été scrapée
+    # pour le même périmètre plateforme ?
+    products = await sim_cache.get(search_request.query, search_request.platform)
+
+    if products is None:
+        task = in_flight.get(cache_key)
+        if task is not None:
+            # Un scrape identique est déjà en vol : on partage son résultat
+            print(f"⏳ Scrape déjà en cours pour: {search_request.query}")
+            products = await task
+        else:
+            # Lancer le scraping
+            print(f"🚀 Nouveau scraping pour: {search_request.query}")
+            task = asyncio.create_task(scrape_all_platforms(
+                search_request.query,
+                search_request.platform
+            ))
+            in_flight[cache_key] = task
+            try:
+                products = await task
+            finally:
+                in_flight.pop(cache_key, None)
+            await sim_cache.set(search_request.query, products,
+                                search_request.platform)
+
     # Filtrer selon les critères
     if search_request.location and search_request.location != 'all':
         products = [p for p in products if p['location'] == search_request.location]
@@ -324,10 +516,10 @@ async def search_products(
     products = products[:search_request.max_results]
     
     # Sauvegarder dans le cache
-    cache[cache_key] = (products, datetime.now())
+    cache[cache_key] = products
     
-    # Sauvegarder dans la base de données (en arrière-plan)
-    background_tasks.add_task(save_products, products)
+    # Sauvegarder dans la base de données (en arrière-plan, hors event loop)
+    background_tasks.add_task(save_products_async, products)
     
     return {
         "status": "success",
@@ -349,18 +541,21 @@ async def refresh_data(
     print(f"🔄 Refresh forcé pour: {query}")
     
     # Invalider le cache
-    cache_key = get_cache_key(query, None, platform)
-    if cache_key in cache:
-        del cache[cache_key]
+    cache.pop(get_cache_key(query, None, platform), None)
     
     # Lancer le scraping
     products = await scrape_all_platforms(query, platform)
-    
+
+    # Écraser aussi l'entrée du cache sémantique, sinon la prochaine
+    # recherche resservirait les produits d'avant le refresh
+    await sim_cache.set(query, products, platform)
+
+
     # Sauvegarder
     if background_tasks:
-        background_tasks.add_task(save_products, products)
+        background_tasks.add_task(save_products_async, products)
     else:
-        save_products(products)
+        await save_products_async(products)
     
     return {
         "status": "success",
@@ -370,12 +565,18 @@ async def refresh_data(
     }
 
 @app.get("/api/stats", response_model=StatsResponse)
-async def get_stats():
+async def get_stats(request: Request, response: Response):
     """
     Retourne les statistiques globales
     """
     products = load_products()
-    
+
+    etag = products_etag()
+    if etag:
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304)
+        response.headers["ETag"] = etag
+
     if not products:
         return StatsResponse(
             total_products=0,
@@ -386,27 +587,20 @@ async def get_stats():
             categories={}
         )
     
-    # Calculer les stats
-    total_savings = sum(p['priceAverage'] - p['priceSale'] for p in products)
-    avg_discount = sum(p['discount'] for p in products) / len(products)
-    
-    # Compter par plateforme
-    platforms = {}
-    for p in products:
-        platforms[p['platform']] = platforms.get(p['platform'], 0) + 1
-    
-    # Compter par catégorie
-    categories = {}
-    for p in products:
-        categories[p['category']] = categories.get(p['category'], 0) + 1
-    
+    # Agrégats vectorisés sur la vue colonne (pas de boucle Python par produit)
+    soa = _products_cache["soa"]
+    discounts = soa['discount']
+
+    platform_names, platform_counts = np.unique(soa['platform'], return_counts=True)
+    category_names, category_counts = np.unique(soa['category'], return_counts=True)
+
     return StatsResponse(
         total_products=len(products),
-        good_deals_count=len([p for p in products if p['discount'] >= 50]),
-        average_discount=round(avg_discount, 1),
-        total_savings=round(total_savings, 2),
-        platforms=platforms,
-        categories=categories
+        good_deals_count=int((discounts >= 50).sum()),
+        average_discount=round(float(discounts.mean()), 1),
+        total_savings=round(float((soa['priceAverage'] - soa['priceSale']).sum()), 2),
+        platforms=dict(zip(platform_names.tolist(), platform_counts.tolist())),
+        categories=dict(zip(category_names.tolist(), category_counts.tolist()))
     )
 
 @app.get("/api/locations")
@@ -414,8 +608,8 @@ async def get_locations():
     """
     Retourne la liste des localisations disponibles
     """
-    products = load_products()
-    locations = sorted(list(set(p['location'] for p in products)))
+    # dict.fromkeys : déduplication en un seul passage (plus rapide que set + list)
+    locations = sorted(dict.fromkeys(p['location'] for p in load_products()))
     return {"locations": locations}
 
 @app.get("/api/categories")
@@ -423,8 +617,7 @@ async def get_categories():
     """
     Retourne la liste des catégories disponibles
     """
-    products = load_products()
-    categories = sorted(list(set(p['category'] for p in products)))
+    categories = sorted(dict.fromkeys(p['category'] for p in load_products()))
     return {"categories": categories}
 
 @app.get("/api/health")
@@ -449,4 +642,7 @@ if __name__ == "__main__":
 ╚══════════════════════════════════════════╝
     """)
     
-    uvicorn.run(app, host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    # uvloop (event loop libuv) + httptools (parseur HTTP en C) : même API,
+    # débit nettement supérieur à la boucle asyncio par défaut
+    uvicorn.run(app, host="0.0.0.0", port=8000, reload=True,
+                loop="uvloop", http="httptools")
\ No newline at end of file